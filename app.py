@@ -1,18 +1,29 @@
-import base64
+import hashlib
+import io
 import os
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
-import google.generativeai as genai
 import requests
 import streamlit as st
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from googletrans import Translator
-from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Load environment variables
 load_dotenv()
+BLYNK_URL = os.getenv("BLYNK_URL")
+BLYNK_TOKEN = os.getenv("BLYNK_TOKEN")
+WEATHER_KEY = os.getenv("WEATHER_API_KEY")
+BLYNK_UPDATE = f"{BLYNK_URL}update?token={BLYNK_TOKEN}&pin={{pin}}&value={{value}}"
+WEATHER_API_URL = "http://api.weatherapi.com"
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GPT_API_KEY"))
+# Gemini models: Flash for interactive analysis, Pro for "Deep analysis"
+FLASH_MODEL = "gemini-1.5-flash"
+PRO_MODEL = "gemini-1.5-pro"
 
 # Sensor and plant data
 sensor_pins = {
@@ -22,6 +33,10 @@ sensor_pins = {
     "fertilizer_pump": "V3",
     "irrigation_pump": "V4",
 }
+BLYNK_GET_ALL = f"{BLYNK_URL}get?token={BLYNK_TOKEN}&" + "&".join(sensor_pins.values())
+BLYNK_PIN_URLS = {
+    pin: f"{BLYNK_URL}get?token={BLYNK_TOKEN}&pin={pin}" for pin in sensor_pins.values()
+}
 optimal_conditions = {
     "pepper": {
         "temperature": (25, 30),
@@ -39,6 +54,7 @@ optimal_conditions = {
         "humidity": (65, 80),
     },
 }
+PLANT_NAMES = tuple(optimal_conditions)
 
 # Emojis for weather conditions
 weather_emojis = {
@@ -54,97 +70,430 @@ weather_emojis = {
     "Mist": "🌫️",
 }
 
-# Translator setup
-translator = Translator()
+# Supported languages and their translation codes
+LANG_CODES = types.MappingProxyType(
+    {"English": "en", "Yoruba": "yo", "Igbo": "ig", "Hausa": "ha"}
+)
+
+# Static UI strings, translated once per language
+UI_STRINGS = (
+    "🌱 Zen Core Tech Growth Monitoring",
+    "Enter LGA for weather details",
+    "Temperature",
+    "Weather Condition",
+    "Humidity",
+    "Soil Moisture",
+    "Choose a plant to monitor",
+    "Analyze Soil",
+    "Soil Analysis",
+    "Deep analysis",
+    "Refresh sensors",
+    "Sensors are not responding.",
+    "Pump Control",
+    "Activate Irrigation",
+    "Activate Fertigation",
+    "Pump command queued.",
+    "Last pump command delivered.",
+    "Last pump command failed.",
+    "Upload an image of your plant",
+    "Uploaded Plant Image",
+    "Analyze Plant",
+    "Plant Analysis",
+)
+
+HTTP_TIMEOUT = (1, 3)
+GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
+# Without a Cloud project the app stays in English instead of failing
+TRANSLATE_PARENT = (
+    f"projects/{GOOGLE_CLOUD_PROJECT}/locations/global"
+    if GOOGLE_CLOUD_PROJECT
+    else None
+)
+
+
+# Shared HTTP session with connection pooling and retries, built once per process
+@st.cache_resource(show_spinner=False)
+def get_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(
+            total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
-# Fetch sensor data from Blynk
-def fetch_sensor_data():
-    sensor_data = {}
-    for sensor, pin in sensor_pins.items():
+# Open pooled connections to Blynk and WeatherAPI in the background, once per process
+@st.cache_resource(show_spinner=False)
+def preconnect():
+    session = get_session()
+    hosts = [WEATHER_API_URL]
+    if BLYNK_URL:
+        blynk = urlsplit(BLYNK_URL)
+        hosts.append(f"{blynk.scheme}://{blynk.netloc}")
+
+    def warm():
+        for host in hosts:
+            try:
+                session.head(host, timeout=2)
+            except requests.RequestException:
+                pass
+
+    threading.Thread(target=warm, daemon=True).start()
+
+
+# Import and configure the Gemini SDK on first use, once per process
+@st.cache_resource(show_spinner=False)
+def get_genai():
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GPT_API_KEY"))
+    return genai
+
+
+# Gemini model client, built once per process and model name
+@st.cache_resource(show_spinner=False)
+def get_gemini_model(name=FLASH_MODEL):
+    return get_genai().GenerativeModel(name)
+
+
+# Translator setup (Google Cloud Translation v3), built once per process
+@st.cache_resource(show_spinner=False)
+def get_translator():
+    # A failure is cached as None so the client is not rebuilt on every call
+    try:
+        from google.cloud import translate_v3
+
+        return translate_v3.TranslationServiceClient()
+    except Exception:
+        return None
+
+
+# Cloud Translation client, or an error if it could not be built
+def _require_translator():
+    translator = get_translator()
+    if translator is None:
+        raise RuntimeError("Cloud Translation client is unavailable.")
+    return translator
+
+
+# Parse one pin value from a Blynk multi-pin response
+def _parse_pin(values, pin):
+    try:
+        return float(values[pin])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# Errors meaning Blynk itself is down; raised so the outage is never cached
+BLYNK_OUTAGE_ERRORS = (
+    requests.Timeout,
+    requests.ConnectionError,
+    requests.exceptions.RetryError,
+)
+
+
+# Fetch pin values one request at a time, for servers without multi-pin reads
+def _fetch_pins_individually():
+    values = {}
+    for pin, url in BLYNK_PIN_URLS.items():
         try:
-            response = requests.get(
-                f"{os.getenv('BLYNK_URL')}get?token={os.getenv('BLYNK_TOKEN')}&pin={pin}"
-            )
+            response = get_session().get(url, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
-            sensor_data[sensor] = float(response.text)
-        except Exception:
-            sensor_data[sensor] = None
-    return sensor_data
+            values[pin] = response.text
+        except BLYNK_OUTAGE_ERRORS:
+            raise
+        except requests.RequestException:
+            pass
+    return values
 
 
-# Fetch weather data from WeatherAPI
-def fetch_weather(lga):
+# Fetch sensor data from Blynk in a single multi-pin request
+@st.cache_data(ttl=10, show_spinner=False)
+def fetch_sensor_data():
     try:
-        url = f"http://api.weatherapi.com/v1/current.json?key={os.getenv('WEATHER_API_KEY')}&q={lga}&aqi=no"
-        response = requests.get(url)
-        response.raise_for_status()
-        weather_data = response.json()
-        condition = weather_data["current"]["condition"]["text"]
-        return {
-            "temperature": weather_data["current"]["temp_c"],
-            "condition": condition,
-            "emoji": weather_emojis.get(condition, "🌤️"),
-            "humidity": weather_data["current"]["humidity"],
-        }
-    except Exception as e:
-        return {"error": str(e)}
-
-
-# Translate text using Google Translator
+        response = get_session().get(BLYNK_GET_ALL, timeout=HTTP_TIMEOUT)
+        if response.ok:
+            values = response.json()
+        else:
+            values = _fetch_pins_individually()
+    except BLYNK_OUTAGE_ERRORS:
+        # Not cached, so the next rerun polls Blynk again
+        raise
+    except Exception:
+        values = {}
+    return {sensor: _parse_pin(values, pin) for sensor, pin in sensor_pins.items()}
+
+
+# Fetch weather data from WeatherAPI; errors raise so they are never cached
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_weather(lga):
+    url = f"{WEATHER_API_URL}/v1/current.json?key={WEATHER_KEY}&q={lga}&aqi=no"
+    response = get_session().get(url, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    weather_data = response.json()
+    condition = weather_data["current"]["condition"]["text"]
+    return {
+        "temperature": weather_data["current"]["temp_c"],
+        "condition": condition,
+        "emoji": weather_emojis.get(condition, "🌤️"),
+        "humidity": weather_data["current"]["humidity"],
+    }
+
+
+# Translate text using Google Cloud Translation
+@st.cache_data(max_entries=4096, show_spinner=False)
 def translate_text(text, language):
-    lang_codes = {"English": "en", "Yoruba": "yo", "Igbo": "ig", "Hausa": "ha"}
-    target_lang = lang_codes.get(language, "en")
-    return translator.translate(text, dest=target_lang).text
+    target_lang = LANG_CODES.get(language, "en")
+    if target_lang == "en" or TRANSLATE_PARENT is None:
+        return text
+    response = _require_translator().translate_text(
+        parent=TRANSLATE_PARENT,
+        contents=[text],
+        mime_type="text/plain",
+        target_language_code=target_lang,
+    )
+    return response.translations[0].translated_text
+
+
+# Translate a batch of strings in a single Google Cloud Translation call
+@st.cache_data(show_spinner=False)
+def translate_batch(texts, language):
+    target_lang = LANG_CODES.get(language, "en")
+    if target_lang == "en" or TRANSLATE_PARENT is None:
+        return {text: text for text in texts}
+    response = _require_translator().translate_text(
+        parent=TRANSLATE_PARENT,
+        contents=list(texts),
+        mime_type="text/plain",
+        target_language_code=target_lang,
+    )
+    return {
+        text: result.translated_text
+        for text, result in zip(texts, response.translations)
+    }
+
+
+# Translate the static UI strings once per language and keep them in the session;
+# None means translation is unavailable and the page stays in English
+def load_ui_translations(language):
+    key = f"i18n_{language}"
+    if key not in st.session_state:
+        if language != "English" and TRANSLATE_PARENT is None:
+            st.warning("Translation is not configured, showing English text.")
+            return None
+        try:
+            st.session_state[key] = translate_batch(UI_STRINGS, language)
+        except Exception:
+            st.warning("Translation is unavailable, showing English text.")
+            return None
+    return st.session_state[key]
+
 
+# Background workers for pump commands, shared across sessions
+@st.cache_resource(show_spinner=False)
+def get_pump_pool():
+    return ThreadPoolExecutor(max_workers=2)
 
-# Control pumps through Blynk
+
+# Send a pump command to Blynk
+def _send_pump_command(pump_pin):
+    response = get_session().get(
+        BLYNK_UPDATE.format(pin=pump_pin, value=1), timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+
+
+# Control pumps through Blynk without blocking the page on the request
 def control_pump(pump_pin):
-    try:
-        requests.get(
-            f"{os.getenv('BLYNK_URL')}update?token={os.getenv('BLYNK_TOKEN')}&pin={pump_pin}&value=1"
-        )
-        return "Pump activated successfully."
-    except Exception as e:
-        return str(e)
+    st.session_state["last_pump_future"] = get_pump_pool().submit(
+        _send_pump_command, pump_pin
+    )
+    return "Pump command queued."
+
+
+# Completed Gemini analyses, shared across sessions; one cache per lifetime.
+# TTLCache is not thread-safe, so every access holds the paired lock.
+@st.cache_resource(show_spinner=False)
+def get_analysis_cache(ttl=300):
+    return TTLCache(maxsize=256, ttl=ttl), threading.Lock()
+
+
+# Round sensor readings so near-identical polls share one cached analysis
+def round_readings(sensor_data):
+    temperature = sensor_data.get("temperature")
+    soil_moisture = sensor_data.get("soil_moisture")
+    humidity = sensor_data.get("humidity")
+    return (
+        None if temperature is None else round(temperature),
+        None if soil_moisture is None else round(soil_moisture),
+        None if humidity is None else round(humidity),
+    )
+
+
+# Prompt for the soil analysis
+def soil_prompt(readings, language):
+    temperature, soil_moisture, humidity = readings
+    return f"Analyze the soil with temperature={temperature}°C, soil moisture={soil_moisture}%, and humidity={humidity}%. Identify any issue, its possible cause, and suggest one solution in {language}."
+
+
+# Prompt for the plant image analysis
+def plant_prompt(language):
+    return f" Analyze this plant image and summarize your findings:Identify the disease (if any) affecting the plant.State one possible cause of the disease.Recommend a solution (includin what can be used to treat it).. Provide the response in {language}."
 
 
 # Soil analysis using Gemini
-def analyze_soil(sensor_data, language):
-    prompt = f"Analyze the soil with temperature={sensor_data.get('temperature')}°C, soil moisture={sensor_data.get('soil_moisture')}%, and humidity={sensor_data.get('humidity')}%. Identify any issue, its possible cause, and suggest one solution in {language}."
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(prompt)
-    return response.text if response.text else "Analysis failed."
+def analyze_soil(readings, language, deep=False):
+    model = get_gemini_model(PRO_MODEL if deep else FLASH_MODEL)
+    for chunk in model.generate_content(soil_prompt(readings, language), stream=True):
+        yield chunk.text
+
+
+# Downscale an image and encode it as JPEG bytes for upload
+def prepare_image(image_bytes, max_size=(1024, 1024)):
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(image_bytes))
+    # Let the JPEG decoder scale down while decoding instead of after
+    img.draft("RGB", max_size)
+    img.thumbnail(max_size, Image.LANCZOS)
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="JPEG", quality=85, optimize=True)
+    return buf.getvalue()
 
 
 # Plant image analysis using Gemini
-def analyze_plant(image_path, language):
-    with open(image_path, "rb") as img_file:
-        img_content = base64.b64encode(img_file.read()).decode("utf-8")
-    prompt = f" Analyze this plant image and summarize your findings:Identify the disease (if any) affecting the plant.State one possible cause of the disease.Recommend a solution (includin what can be used to treat it).. Provide the response in {language}."
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(
-        [{"mime_type": "image/jpeg", "data": img_content}, prompt]
-    ).text
-    return response if response else "Analysis failed."
-
-
-# Reusable function to render cards
-def render_card(title, content):
-    return f"""
-    <div style="
-        background-color: white; 
-        color: black; 
-        border: 2px solid black; 
-        border-radius: 10px; 
-        padding: 20px; 
-        margin-bottom: 20px;
-        box-shadow: 5px 5px 15px rgba(0, 0, 0, 0.3);
-    ">
-        <h3 style="text-align: center;">{title}</h3>
-        <p style="text-align: center;">{content}</p>
-    </div>
-    """
+def analyze_plant(image_bytes, language, deep=False):
+    model = get_gemini_model(PRO_MODEL if deep else FLASH_MODEL)
+    image = {"mime_type": "image/jpeg", "data": prepare_image(image_bytes)}
+    for chunk in model.generate_content([plant_prompt(language), image], stream=True):
+        yield chunk.text
+
+
+# Marker lines that split a combined soil and plant analysis; chosen so they
+# cannot turn up in ordinary advice text
+SOIL_MARKER = "===SOIL==="
+PLANT_MARKER = "===PLANT==="
+
+
+# Soil and plant image analysis in a single Gemini call
+def analyze_combined(readings, image_bytes, language, deep=False):
+    prompt = (
+        f"{soil_prompt(readings, language)} Then, for the attached image:"
+        f"{plant_prompt(language)} Begin the soil part with a line containing "
+        f"only {SOIL_MARKER} and the plant part with a line containing only "
+        f"{PLANT_MARKER}, written exactly like that and used nowhere else."
+    )
+    model = get_gemini_model(PRO_MODEL if deep else FLASH_MODEL)
+    image = {"mime_type": "image/jpeg", "data": prepare_image(image_bytes)}
+    for chunk in model.generate_content([prompt, image], stream=True):
+        yield chunk.text
+
+
+# Split a combined analysis into its soil and plant parts, or None unless the
+# reply has exactly one soil marker line followed by exactly one plant marker line
+def split_combined(text):
+    lines = text.splitlines()
+    stripped = [line.strip() for line in lines]
+    if stripped.count(SOIL_MARKER) != 1 or stripped.count(PLANT_MARKER) != 1:
+        return None
+    soil_at = stripped.index(SOIL_MARKER)
+    plant_at = stripped.index(PLANT_MARKER)
+    if soil_at > plant_at:
+        return None
+    soil = "\n".join(lines[soil_at + 1 : plant_at]).strip()
+    plant = "\n".join(lines[plant_at + 1 :]).strip()
+    return soil, plant
+
+
+# Look up a completed analysis
+def cached_analysis(cache_key, ttl=300):
+    cache, lock = get_analysis_cache(ttl)
+    with lock:
+        return cache.get(cache_key)
+
+
+# Store a completed analysis
+def store_analysis(cache_key, text, ttl=300):
+    cache, lock = get_analysis_cache(ttl)
+    with lock:
+        cache[cache_key] = text
+
+
+# Render a bordered card with a finished analysis
+def render_card(title, text):
+    with st.container(border=True):
+        st.subheader(title)
+        st.markdown(text)
+
+
+# Render bordered cards that fill in as streamed text chunks arrive. Each card
+# has its own (cache_key, ttl) entry; the chunks are only consumed on a miss.
+# Returns the (title, text) pairs that ended up on screen.
+def render_streamed_cards(titles, chunks, split=None, cache_entries=()):
+    placeholders = []
+    for title in titles:
+        with st.container(border=True):
+            st.subheader(title)
+            placeholders.append(st.empty())
+
+    def show(parts):
+        for placeholder, part in zip(placeholders, parts):
+            placeholder.markdown(part)
+        return list(zip(titles, parts))
+
+    cached = [cached_analysis(key, ttl) for key, ttl in cache_entries]
+    if cached and all(part is not None for part in cached):
+        return show(cached)
+
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        # Until the reply can be split, stream it into the first card
+        show((split and split(text)) or (text,))
+    if not text:
+        return show(["Analysis failed."] * len(titles))
+    parts = split(text) if split else (text,)
+    if parts is None:
+        # The reply could not be split: show it whole in the last card, uncached
+        return show([""] * (len(titles) - 1) + [text])
+    for (key, ttl), part in zip(cache_entries, parts):
+        if part:
+            store_analysis(key, part, ttl)
+    return show(parts)
+
+
+# Render a single bordered card that fills in as streamed text chunks arrive
+def render_streamed_card(title, chunks, cache_key=None, cache_ttl=300):
+    cache_entries = () if cache_key is None else ((cache_key, cache_ttl),)
+    return render_streamed_cards((title,), chunks, cache_entries=cache_entries)
+
+
+# Flag an analysis as in flight; runs before the rerun the click triggers
+def _start_analysis(flag):
+    st.session_state[flag] = True
+
+
+# Keep a finished analysis and rerun, so its button is drawn enabled again
+# with the result underneath
+def finish_analysis(flag, cards):
+    st.session_state.setdefault("analysis_results", {})[flag] = cards
+    st.rerun()
+
+
+# Analysis button that renders disabled while its Gemini call is in flight,
+# followed by the result of the analysis it just finished, if any.
+# The flag is consumed here, so it never outlives the rerun its click triggered.
+def analysis_button(label, flag):
+    in_flight = st.session_state.pop(flag, False)
+    st.button(label, disabled=in_flight, on_click=_start_analysis, args=(flag,))
+    for title, text in st.session_state.get("analysis_results", {}).get(flag, ()):
+        render_card(title, text)
+    return in_flight
 
 
 # Streamlit App
@@ -152,120 +501,103 @@ def app():
     st.set_page_config(
         page_title="🌱 Zen-Core-Tech Monitoring", page_icon="🌿", layout="wide"
     )
+    preconnect()
 
     # Language selection modal
-    language = st.sidebar.selectbox(
-        "Choose your language", ["English", "Yoruba", "Igbo", "Hausa"]
-    )
+    language = st.sidebar.selectbox("Choose your language", list(LANG_CODES))
+
+    ui_text = load_ui_translations(language)
 
     # Function to translate all text dynamically
     def t(text):
-        return translate_text(text, language)
+        if ui_text is None:
+            return text
+        if text in ui_text:
+            return ui_text[text]
+        try:
+            return translate_text(text, language)
+        except Exception:
+            return text
+
+    deep_analysis = st.sidebar.toggle(t("Deep analysis"))
+    if st.sidebar.button(t("Refresh sensors")):
+        fetch_sensor_data.clear()
 
     # Title
-    st.markdown(
-        f"<h1 style='text-align: center;'>{t('🌱 Zen Core Tech Growth Monitoring')}</h1>",
-        unsafe_allow_html=True,
-    )
+    st.title(t("🌱 Zen Core Tech Growth Monitoring"))
 
     # Weather Data Section
     lga = st.text_input(t("Enter LGA for weather details"), "Lagos")
-    weather_data = fetch_weather(lga)
+
+    # Weather and sensor data are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        weather_future = executor.submit(fetch_weather, lga)
+        sensor_future = executor.submit(fetch_sensor_data)
+        try:
+            weather_data = weather_future.result()
+        except Exception as e:
+            weather_data = {"error": str(e)}
+        try:
+            sensor_data = sensor_future.result()
+        except BLYNK_OUTAGE_ERRORS:
+            st.toast(t("Sensors are not responding."))
+            sensor_data = dict.fromkeys(sensor_pins)
+
     if "error" not in weather_data:
         # Display weather data in 3 columns
         col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown(
-                render_card(
-                    t("Temperature"),
-                    f"<b>{t('Temperature')}:</b> {weather_data['temperature']}°C",
-                ),
-                unsafe_allow_html=True,
-            )
-        with col2:
-            st.markdown(
-                render_card(
-                    t("Weather Condition"),
-                    f"<b>{t('Condition')}:</b> {t(weather_data['condition'])} {weather_data['emoji']}",
-                ),
-                unsafe_allow_html=True,
-            )
-        with col3:
-            st.markdown(
-                render_card(
-                    t("Humidity"),
-                    f"<b>{t('Humidity')}:</b> {weather_data['humidity']}%",
-                ),
-                unsafe_allow_html=True,
-            )
+        col1.metric(t("Temperature"), f"{weather_data['temperature']}°C")
+        col2.metric(
+            t("Weather Condition"),
+            f"{t(weather_data['condition'])} {weather_data['emoji']}",
+        )
+        col3.metric(t("Humidity"), f"{weather_data['humidity']}%")
     else:
         st.error(t(weather_data["error"]))
 
     # Optimal Conditions Section
-    plant_name = st.selectbox(
-        t("Choose a plant to monitor"), ["pepper", "groundnut", "tomato"]
-    )
+    plant_name = st.selectbox(t("Choose a plant to monitor"), PLANT_NAMES)
     optimal = optimal_conditions[plant_name]
 
     # Display optimal conditions in 3 columns
     col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(
-            render_card(
-                t(f"Optimal {t('Temperature')} for {plant_name.capitalize()}"),
-                f"<b>{t('Temperature')}:</b> {optimal['temperature'][0]}°C - {optimal['temperature'][1]}°C",
-            ),
-            unsafe_allow_html=True,
-        )
-    with col2:
-        st.markdown(
-            render_card(
-                t(f"Optimal {t('Soil Moisture')} for {plant_name.capitalize()}"),
-                f"<b>{t('Soil Moisture')}:</b> {optimal['soil_moisture'][0]}% - {optimal['soil_moisture'][1]}%",
-            ),
-            unsafe_allow_html=True,
-        )
-    with col3:
-        st.markdown(
-            render_card(
-                t(f"Optimal {t('Humidity')} for {plant_name.capitalize()}"),
-                f"<b>{t('Humidity')}:</b> {optimal['humidity'][0]}% - {optimal['humidity'][1]}%",
-            ),
-            unsafe_allow_html=True,
-        )
-
-    # Real-Time Sensor Data Section
-    sensor_data = fetch_sensor_data()
-    st.markdown(
-        render_card(
-            t("Temperature"),
-            f"<b>{t('Temperature')}:</b> {sensor_data.get('temperature')}°C",
-        ),
-        unsafe_allow_html=True,
+    col1.metric(
+        t(f"Optimal {t('Temperature')} for {plant_name.capitalize()}"),
+        f"{optimal['temperature'][0]}°C - {optimal['temperature'][1]}°C",
     )
-    st.markdown(
-        render_card(
-            t("Soil Moisture"),
-            f"<b>{t('Soil Moisture')}:</b> {sensor_data.get('soil_moisture')}%",
-        ),
-        unsafe_allow_html=True,
+    col2.metric(
+        t(f"Optimal {t('Soil Moisture')} for {plant_name.capitalize()}"),
+        f"{optimal['soil_moisture'][0]}% - {optimal['soil_moisture'][1]}%",
     )
-    st.markdown(
-        render_card(
-            t("Humidity"), f"<b>{t('Humidity')}:</b> {sensor_data.get('humidity')}%"
-        ),
-        unsafe_allow_html=True,
+    col3.metric(
+        t(f"Optimal {t('Humidity')} for {plant_name.capitalize()}"),
+        f"{optimal['humidity'][0]}% - {optimal['humidity'][1]}%",
     )
 
+    # Real-Time Sensor Data Section
+    col1, col2, col3 = st.columns(3)
+    col1.metric(t("Temperature"), f"{sensor_data.get('temperature')}°C")
+    col2.metric(t("Soil Moisture"), f"{sensor_data.get('soil_moisture')}%")
+    col3.metric(t("Humidity"), f"{sensor_data.get('humidity')}%")
+
     # Soil Analysis Button
-    if st.button(t("Analyze Soil")):
-        soil_analysis = analyze_soil(sensor_data, language)
-        st.markdown(
-            render_card(t("Soil Analysis"), soil_analysis), unsafe_allow_html=True
+    if analysis_button(t("Analyze Soil"), "analyzing_soil"):
+        readings = round_readings(sensor_data)
+        cards = render_streamed_card(
+            t("Soil Analysis"),
+            analyze_soil(readings, language, deep_analysis),
+            cache_key=("soil", readings, language, deep_analysis),
         )
+        finish_analysis("analyzing_soil", cards)
 
     # Pump Control Section
     st.markdown(f"### {t('Pump Control')}")
+    last_pump = st.session_state.get("last_pump_future")
+    if last_pump is not None and last_pump.done():
+        if last_pump.exception() is None:
+            st.caption(t("Last pump command delivered."))
+        else:
+            st.error(t("Last pump command failed."))
     col1, col2 = st.columns(2)
     with col1:
         if st.button(t("Activate Irrigation")):
@@ -281,20 +613,62 @@ def app():
         t("Upload an image of your plant"), type=["jpg", "jpeg", "png"]
     )
     if uploaded_image:
-        img = Image.open(uploaded_image)
+        image_bytes = uploaded_image.getvalue()
         st.image(
-            img,
+            image_bytes,
             caption=t("Uploaded Plant Image"),
             width=400,
         )
-        if st.button(t("Analyze Plant")):
-            img_path = f"temp_image.{uploaded_image.type.split('/')[-1]}"
-            img.save(img_path)
-            plant_analysis = analyze_plant(img_path, language)
-            os.remove(img_path)
-            st.markdown(
-                render_card(t("Plant Analysis"), plant_analysis), unsafe_allow_html=True
-            )
+        if analysis_button(t("Analyze Plant"), "analyzing_plant"):
+            image_hash = hashlib.sha256(image_bytes).hexdigest()
+            readings = round_readings(sensor_data)
+            soil_key = ("soil", readings, language, deep_analysis)
+            plant_key = ("plant", image_hash, language, deep_analysis)
+            if all(value is None for value in readings):
+                cards = render_streamed_card(
+                    t("Plant Analysis"),
+                    analyze_plant(image_bytes, language, deep_analysis),
+                    cache_key=plant_key,
+                    cache_ttl=3600,
+                )
+            elif cached_analysis(plant_key, 3600) is not None:
+                # Photo already analyzed: only the soil readings need Gemini
+                cards = render_streamed_card(
+                    t("Soil Analysis"),
+                    analyze_soil(readings, language, deep_analysis),
+                    cache_key=soil_key,
+                )
+                cards += render_streamed_card(
+                    t("Plant Analysis"),
+                    analyze_plant(image_bytes, language, deep_analysis),
+                    cache_key=plant_key,
+                    cache_ttl=3600,
+                )
+            elif cached_analysis(soil_key) is not None:
+                # Readings already analyzed: only the photo needs Gemini
+                cards = render_streamed_card(
+                    t("Soil Analysis"),
+                    analyze_soil(readings, language, deep_analysis),
+                    cache_key=soil_key,
+                )
+                cards += render_streamed_card(
+                    t("Plant Analysis"),
+                    analyze_plant(image_bytes, language, deep_analysis),
+                    cache_key=plant_key,
+                    cache_ttl=3600,
+                )
+            else:
+                # One Gemini call covers both the soil readings and the photo
+                cards = render_streamed_cards(
+                    (t("Soil Analysis"), t("Plant Analysis")),
+                    analyze_combined(readings, image_bytes, language, deep_analysis),
+                    split=split_combined,
+                    cache_entries=((soil_key, 300), (plant_key, 3600)),
+                )
+            finish_analysis("analyzing_plant", cards)
+
+    # Finished analyses are shown for one rerun only
+    st.session_state.pop("analysis_results", None)
 
 
 if __name__ == "__main__":